@@ -2,23 +2,35 @@
 # Pros: Quick to set up, decent accuracy on simple CAPTCHAs, returns per-word confidence.
 # Cons: May struggle with heavy obfuscation or overlapping characters.
 
+import functools
 from typing import Dict, Any
-import easyocr
 
-from scripts.preprocess import preprocess_pipeline
+from scripts.preprocess import preprocess_min
+
+
+@functools.lru_cache(maxsize=4)
+def _get_reader(lang_tuple: tuple, gpu: bool):
+    """
+    Cache Reader instances: construction takes >1s (model load + warmup),
+    so repeated solves must not pay it per call.
+    """
+    import easyocr  # lazy: importing easyocr is slow and only needed on this path
+
+    return easyocr.Reader(list(lang_tuple), gpu=gpu, verbose=False)
 
 
 def predict_easyocr(image_path: str, lang_list=("en",)) -> Dict[str, Any]:
-    prep = preprocess_pipeline(image_path, method="otsu")
-    reader = easyocr.Reader(lang_list, gpu=False, verbose=False)
+    _, de_skew = preprocess_min(image_path, method="otsu")
+    reader = _get_reader(tuple(lang_list), False)
     # Work directly on deskewed binary for clarity (EasyOCR can accept grayscale arrays)
-    results = reader.readtext(prep["deskew"])
+    results = reader.readtext(de_skew)
     # results: list of (bbox, text, conf)
 
+    # segments stay empty here; use preprocess.debug_preprocess for boxes
     if not results:
-        return {"text": "", "confidence": 0.0, "debug": {"segments": prep["char_boxes"]}}
+        return {"text": "", "confidence": 0.0, "debug": {"segments": []}}
 
     best = max(results, key=lambda r: r[2])
     text = best[1]
     conf = float(best[2])  # already 0-1
-    return {"text": text, "confidence": conf, "debug": {"segments": prep["char_boxes"]}}
+    return {"text": text, "confidence": conf, "debug": {"segments": []}}
@@ -0,0 +1,47 @@
+# Export the CRNN to ONNX for deployment via ONNX Runtime (CPU) or TensorRT.
+# ORT's graph optimizer fuses Conv+ReLU and runs the LSTM as a single kernel,
+# eliminating the per-op Python dispatch of eager PyTorch.
+#
+# Usage:
+#   python -m scripts.export_onnx weights/crnn.pth crnn.onnx
+
+import sys
+
+import torch
+
+from scripts.model import CRNN
+
+
+def export_onnx(weights_path: str, onnx_path: str = "crnn.onnx") -> str:
+    """
+    Export CRNN weights to an ONNX graph with a dynamic width axis.
+    Exports from an eager module (scripted/frozen modules don't trace cleanly).
+    Returns the output path.
+    """
+    model = CRNN()
+    model.load_state_dict(torch.load(weights_path, map_location="cpu"))
+    model.eval()
+
+    # (B=1, C=1, H=32, W=256); width is dynamic since CAPTCHAs vary in aspect.
+    dummy = torch.zeros(1, 1, 32, 256)
+    torch.onnx.export(
+        model,
+        dummy,
+        onnx_path,
+        opset_version=17,
+        input_names=["input"],
+        output_names=["logits"],
+        dynamic_axes={"input": {3: "W"}, "logits": {0: "T"}},
+        # The dynamo exporter (default on recent torch) cannot decompose the
+        # BiLSTM with a dynamic width axis; the TorchScript exporter handles it.
+        dynamo=False,
+    )
+    return onnx_path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m scripts.export_onnx <weights.pth> [out.onnx]")
+        sys.exit(1)
+    out = export_onnx(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else "crnn.onnx")
+    print(f"Exported ONNX model to: {out}")
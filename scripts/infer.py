@@ -1,36 +1,127 @@
 # Inference pipeline: preprocess -> CRNN -> decode -> confidence
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Sequence
 import numpy as np
 import torch
 
-from scripts.preprocess import preprocess_pipeline
-from scripts.model import load_model, greedy_ctc_decode
+from scripts.preprocess import preprocess_for_infer
+from scripts.model import load_model_cached, greedy_ctc_decode
 
 
 def numpy_to_tensor(norm_img: np.ndarray, device="cpu") -> torch.Tensor:
     """
-    Convert normalized (1, H, W) float32 numpy to torch (B,1,H,W)
+    Convert normalized (1, H, W) float32 numpy to torch (B,1,H,W).
+    For CUDA targets the host tensor is pinned so the H2D copy can run
+    asynchronously; on CPU the tensor shares the numpy buffer (no copy).
     """
-    img = torch.from_numpy(norm_img).unsqueeze(0)  # (1,1,H,W)
-    return img.to(device)
+    img = torch.from_numpy(norm_img).unsqueeze(0)  # (1,1,H,W), contiguous
+    if str(device).startswith("cuda"):
+        return img.pin_memory().to(device, non_blocking=True)
+    return img
 
 
-def predict_local(image_path: str, weights_path: str, device: str = "cpu") -> Dict[str, Any]:
+def predict_local(
+    image_path: str, weights_path: str, device: str = "cpu", precision: str = "fp32"
+) -> Dict[str, Any]:
     """
     Full local inference.
+    precision="fp16" halves weights + input (GPU); "bf16" runs the forward
+    under CPU autocast. Decoding always happens in fp32 so confidence values
+    stay accurate.
     Returns dict { text, confidence, debug: {preprocess artifacts} }
     """
-    prep = preprocess_pipeline(image_path, method="otsu")
-    model = load_model(weights_path, device=device)
-    x = numpy_to_tensor(prep["normalized"], device=device)
-    with torch.no_grad():
-        logits = model(x)                # (T, B, C)
-    text, confidence = greedy_ctc_decode(logits)
+    norm = preprocess_for_infer(image_path, method="otsu")
+    model = load_model_cached(weights_path, str(device), precision)
+    x = numpy_to_tensor(norm, device=device)
+    if precision == "fp16":
+        x = x.half()
+    with torch.inference_mode():
+        if precision == "bf16":
+            with torch.cpu.amp.autocast(dtype=torch.bfloat16):
+                logits = model(x)        # (T, B, C)
+        else:
+            logits = model(x)            # (T, B, C)
+    text, confidence = greedy_ctc_decode(logits.float())
     return {
         "text": text,
         "confidence": float(confidence),
         "debug": {
-            "char_boxes": prep["char_boxes"],
+            "char_boxes": [],  # use preprocess_pipeline for segmentation diagnostics
+            "stages": ["gray", "denoised", "binary", "morph", "deskew", "resized_uint8"],
+        }
+    }
+
+
+def predict_local_batch(
+    image_paths: Sequence[str], weights_path: str, device: str = "cpu"
+) -> List[Dict[str, Any]]:
+    """
+    Batched local inference over many CAPTCHAs.
+    Preprocesses images in parallel (OpenCV releases the GIL), right-pads each
+    normalized array to the widest image in the batch, and runs one forward
+    pass instead of len(image_paths) — the CNN+BiLSTM amortizes far better
+    over a batch. Returns one {text, confidence} dict per input path, in order.
+    """
+    if not image_paths:
+        return []
+    with ThreadPoolExecutor() as pool:
+        # copy: preprocess_for_infer returns a per-thread scratch buffer that
+        # the next image on the same worker would overwrite
+        normed = list(pool.map(lambda p: preprocess_for_infer(p, method="otsu").copy(), image_paths))
+    # each (1, H, W)
+    max_w = max(n.shape[-1] for n in normed)
+    padded = [
+        np.pad(n, ((0, 0), (0, 0), (0, max_w - n.shape[-1]))) if n.shape[-1] < max_w else n
+        for n in normed
+    ]
+    x = torch.from_numpy(np.stack(padded)).to(device)  # (B, 1, H, max_W)
+
+    model = load_model_cached(weights_path, str(device))
+    with torch.inference_mode():
+        logits = model(x)  # (T, B, C)
+
+    results: List[Dict[str, Any]] = []
+    for i in range(logits.shape[1]):
+        text, confidence = greedy_ctc_decode(logits[:, i : i + 1, :])
+        results.append({"text": text, "confidence": float(confidence)})
+    return results
+
+
+# ONNX Runtime sessions cached per model path (session creation is the
+# expensive part; subsequent runs reuse the optimized graph).
+_ORT_SESSIONS: Dict[str, Any] = {}
+
+
+def _get_ort_session(onnx_path: str):
+    session = _ORT_SESSIONS.get(onnx_path)
+    if session is None:
+        import onnxruntime as ort  # optional dependency; only needed on this path
+
+        so = ort.SessionOptions()
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = ort.InferenceSession(
+            onnx_path, sess_options=so, providers=["CPUExecutionProvider"]
+        )
+        _ORT_SESSIONS[onnx_path] = session
+    return session
+
+
+def predict_local_onnx(image_path: str, onnx_path: str = "crnn.onnx") -> Dict[str, Any]:
+    """
+    Inference via ONNX Runtime on CPU (see scripts/export_onnx.py).
+    ORT fuses the graph, so this skips eager per-op dispatch entirely; the
+    preprocessed numpy array is fed directly with no torch tensor round-trip.
+    """
+    norm = preprocess_for_infer(image_path, method="otsu")
+    session = _get_ort_session(onnx_path)
+    x = norm[None, ...]  # (1, 1, H, W) float32
+    (logits,) = session.run(None, {"input": x})
+    text, confidence = greedy_ctc_decode(torch.from_numpy(logits))
+    return {
+        "text": text,
+        "confidence": float(confidence),
+        "debug": {
+            "char_boxes": [],  # use preprocess_pipeline for segmentation diagnostics
             "stages": ["gray", "denoised", "binary", "morph", "deskew", "resized_uint8"],
         }
     }
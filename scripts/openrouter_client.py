@@ -4,13 +4,31 @@
 # - Uses the OpenAI-compatible /chat/completions endpoint.
 # - We ask the model to return {"text": "...", "confidence": 0-1} and set temperature=0 for determinism.
 
+import asyncio
 import base64
 import json
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Sequence
 
 import httpx
 
+try:
+    import orjson  # optional: C serializer, far faster on MB-scale base64 payloads
+except ImportError:
+    orjson = None
+
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 
 OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
 # Choose a vision-capable model (availability may vary):
@@ -21,14 +39,55 @@ OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
 DEFAULT_MODEL = "openai/gpt-4o-mini"
 
 
-def image_to_data_url(path: str) -> str:
-    with open(path, "rb") as f:
-        b = f.read()
-    b64 = base64.b64encode(b).decode("utf-8")
-    return f"data:image/png;base64,{b64}"
+def _sniff_mime(raw: bytes) -> str:
+    """Detect the image MIME type from magic bytes (default: png)."""
+    if raw.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if raw.startswith(b"GIF8"):
+        return "image/gif"
+    if raw.startswith(b"RIFF") and raw[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/png"
 
 
-def call_openrouter(image_path: str, api_key: str | None = None, model: str = DEFAULT_MODEL) -> Dict[str, Any]:
+def image_to_data_url(path: str) -> str:
+    with open(path, "rb") as f:
+        raw = f.read()
+    # MIME type is sniffed from magic bytes rather than hardcoded to png
+    b64 = base64.b64encode(raw).decode("ascii")
+    return f"data:{_sniff_mime(raw)};base64,{b64}"
+
+
+# Shared clients, created lazily: reusing one connection pool skips the TLS
+# handshake per call, and HTTP/2 (when the h2 extra is installed) multiplexes
+# concurrent requests over a single connection.
+_client: httpx.Client | None = None
+_async_client: httpx.AsyncClient | None = None
+_LIMITS = httpx.Limits(max_keepalive_connections=32)
+
+
+def _get_client() -> httpx.Client:
+    global _client
+    if _client is None:
+        try:
+            _client = httpx.Client(http2=True, timeout=60, limits=_LIMITS)
+        except ImportError:  # h2 not installed; HTTP/1.1 with keep-alive still helps
+            _client = httpx.Client(timeout=60, limits=_LIMITS)
+    return _client
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    global _async_client
+    if _async_client is None:
+        try:
+            _async_client = httpx.AsyncClient(http2=True, timeout=60, limits=_LIMITS)
+        except ImportError:
+            _async_client = httpx.AsyncClient(timeout=60, limits=_LIMITS)
+    return _async_client
+
+
+def _build_request(image_path: str, api_key: str | None, model: str) -> tuple:
+    """Resolve the API key and assemble (headers, payload) for one image."""
     if api_key is None:
         api_key = os.environ.get("OPENROUTER_API_KEY")
     if not api_key:
@@ -66,16 +125,14 @@ def call_openrouter(image_path: str, api_key: str | None = None, model: str = DE
         "X-Title": "captcha-ocr",
         "Content-Type": "application/json",
     }
+    return headers, payload
 
-    with httpx.Client(timeout=60) as client:
-        resp = client.post(OPENROUTER_API_URL, headers=headers, json=payload)
-        resp.raise_for_status()
-        data = resp.json()
 
+def _parse_response(data: Dict[str, Any]) -> Dict[str, Any]:
     # Parse OpenAI-style response
     try:
         content = data["choices"][0]["message"]["content"]
-        parsed = json.loads(content)  # response_format=json_object should enforce JSON
+        parsed = _loads(content)  # response_format=json_object should enforce JSON
         return {
             "text": parsed.get("text", ""),
             "confidence": float(parsed.get("confidence", 0.0)),
@@ -90,6 +147,52 @@ def call_openrouter(image_path: str, api_key: str | None = None, model: str = DE
         }
 
 
+def call_openrouter(image_path: str, api_key: str | None = None, model: str = DEFAULT_MODEL) -> Dict[str, Any]:
+    headers, payload = _build_request(image_path, api_key, model)
+    # Pre-serialized content= skips httpx's stdlib-json encode of the large payload
+    resp = _get_client().post(OPENROUTER_API_URL, headers=headers, content=_dumps(payload))
+    resp.raise_for_status()
+    return _parse_response(_loads(resp.content))
+
+
+async def call_openrouter_async(
+    image_path: str,
+    api_key: str | None = None,
+    model: str = DEFAULT_MODEL,
+    client: httpx.AsyncClient | None = None,
+) -> Dict[str, Any]:
+    """Async variant sharing one AsyncClient, for fanning out many images."""
+    headers, payload = _build_request(image_path, api_key, model)
+    if client is None:
+        client = _get_async_client()
+    resp = await client.post(OPENROUTER_API_URL, headers=headers, content=_dumps(payload))
+    resp.raise_for_status()
+    return _parse_response(_loads(resp.content))
+
+
+def call_openrouter_batch(
+    image_paths: Sequence[str], api_key: str | None = None, model: str = DEFAULT_MODEL
+) -> List[Dict[str, Any]]:
+    """
+    Solve many CAPTCHAs concurrently via asyncio.gather.
+    Uses a client scoped to the batch (asyncio.run closes its event loop, so
+    the long-lived shared client cannot be reused here). Returns one result
+    dict per path, in order.
+    """
+    async def _run() -> List[Dict[str, Any]]:
+        try:
+            client = httpx.AsyncClient(http2=True, timeout=60, limits=_LIMITS)
+        except ImportError:
+            client = httpx.AsyncClient(timeout=60, limits=_LIMITS)
+        async with client:
+            return list(await asyncio.gather(
+                *(call_openrouter_async(p, api_key=api_key, model=model, client=client)
+                  for p in image_paths)
+            ))
+
+    return asyncio.run(_run())
+
+
 # Example minimal request (reference):
 #
 # POST https://openrouter.ai/api/v1/chat/completions
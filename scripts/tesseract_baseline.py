@@ -3,13 +3,13 @@
 
 from typing import Dict, Any
 import pytesseract  # type: ignore
-from scripts.preprocess import preprocess_pipeline
+from scripts.preprocess import preprocess_min
 
 
 def predict_tesseract(image_path: str) -> Dict[str, Any]:
-    prep = preprocess_pipeline(image_path, method="otsu")
+    _, de_skew = preprocess_min(image_path, method="otsu")
     # Tesseract works better with non-inverted text; invert if necessary
-    bin_for_ocr = 255 - prep["deskew"]
+    bin_for_ocr = 255 - de_skew
     # Restrict character set to improve accuracy
     custom_oem_psm_config = r'--oem 1 --psm 7 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
     text = pytesseract.image_to_string(bin_for_ocr, config=custom_oem_psm_config)